@@ -17,8 +17,8 @@ from __future__ import print_function
 
 from argparse import ArgumentParser
 from contextlib import contextmanager
-from hashlib import sha256
 
+import hashlib
 import logging
 import os
 import subprocess
@@ -46,6 +46,10 @@ from jujucharm import (
 
 log = logging.getLogger("assess_agent_metadata")
 
+# Read agent files in 8 MiB blocks so large tarballs are not loaded into
+# memory in one go when computing their SHA256 sum.
+SHA256_CHUNK_SIZE = 8 * 1024 * 1024
+
 
 def get_sha256_sum(filename):
     """
@@ -53,7 +57,13 @@ def get_sha256_sum(filename):
     :param filename: A string representing the filename to operate on
     """
     with open(filename, 'rb') as infile:
-        return sha256(infile.read()).hexdigest()
+        # Python 3.11+ can hash a file object without a Python level loop.
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(infile, 'sha256').hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: infile.read(SHA256_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        return digest.hexdigest()
 
 
 def assert_cloud_details_are_correct(client, cloud_name, example_cloud):
@@ -198,6 +208,11 @@ def verify_deployed_tool(agent_dir, client, agent_stream):
     :param agent_stream: String representing agent stream name
     """
     controller_url, controller_sha256 = get_controller_url_and_sha256(client)
+    # Checking the controller first avoids hashing the local agent file
+    # when there is nothing to compare it against.
+    if controller_url is None or controller_sha256 is None:
+        raise JujuAssertionError(
+            "unable to get agent URL and SHA256 from the controller")
 
     local_url, local_sha256 = get_local_url_and_sha256(
         agent_dir, controller_url, agent_stream)
@@ -374,8 +389,8 @@ def make_unique_tool(agent_file, agent_stream):
         yield agent_dir
 
 
-def parse_args(argv):
-    """Parse all arguments."""
+def _build_parser():
+    """Build the argument parser for this test."""
     parser = ArgumentParser(
         description="Test bootstrap for agent-metdadata-url")
 
@@ -384,7 +399,12 @@ def parse_args(argv):
     parser.add_argument('--agent-file', required=True, action='store',
                         help='agent file to be used during bootstrap.')
 
-    return parser.parse_args(argv)
+    return parser
+
+
+def parse_args(argv):
+    """Parse all arguments."""
+    return _build_parser().parse_args(argv)
 
 
 def main(argv=None):